@@ -1,7 +1,8 @@
 # build_calendars.py
-# Google Sheet (CSV_URL secret) -> public/calendars/<slug>.ics + calendars.json + index.html
+# Google Sheet (CSV_URL secret) -> public/calendars/<slug>.ics + calendars.json + index.html (from templates/)
+# Dates are auto-detected (day-first); set DATE_FORMAT (strptime, e.g. "%d/%m/%Y %H:%M:%S") to pin it.
 #
-# 🎨 COLOR LEGEND (defined in :root CSS variables below)
+# 🎨 COLOR LEGEND (defined in :root CSS variables in templates/index.html)
 # Apple – #f5f5f7
 # Apple text - #000000
 # Google – #ea4335
@@ -17,515 +18,417 @@
 # Sub headline - #f5f5f7
 
 import os
-import re
+import gzip
 import json
-from io import StringIO
+from concurrent.futures import ProcessPoolExecutor
 from hashlib import md5
 
 import requests
 import pandas as pd
-from ics import Calendar, Event
+from pandas.tseries.api import guess_datetime_format
+
+try:  # optional: Arrow-backed strings make the column-wise .str cleanup much cheaper
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = "string"
+
+try:  # optional: faster manifest serialization
+    import orjson
+except ImportError:
+    orjson = None
 
 # ------------------ Config ------------------
 DAYFIRST = True                     # interpret dates as DD/MM/YYYY
+DATE_FORMAT = os.getenv("DATE_FORMAT") or None  # optional strptime format for Start/End cells; else inferred
 DEFAULT_TIMED_DURATION_HOURS = 1    # fallback if end missing/invalid
+GZIP_LEVEL = 6                      # precompressed <file>.gz siblings for static hosts
 OUT_DIR = "public"
 ICS_DIR = os.path.join(OUT_DIR, "calendars")
 MANIFEST_PATH = os.path.join(OUT_DIR, "calendars.json")
 INDEX_HTML_PATH = os.path.join(OUT_DIR, "index.html")
+INDEX_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "index.html")
+
+# Column order of the prepared events frame handed to emit_event()
+EVENT_FIELDS = ["title", "dates", "location", "description", "url", "uid", "transp"]
+
+ONE_DAY = pd.Timedelta(days=1)
+DEFAULT_DURATION = pd.Timedelta(hours=DEFAULT_TIMED_DURATION_HOURS)
 
 CSV_URL = os.getenv("CSV_URL")
-if not CSV_URL:
-    raise ValueError("❌ CSV_URL environment variable is not set (add a repo secret named CSV_URL).")
 
 # ------------------ Helpers -----------------
-_slug_re = re.compile(r"[^a-z0-9]+")
+class _SlugTable(dict):
+    """str.translate table: keep [a-z0-9], map every other code point to '-'."""
+    def __missing__(self, key):
+        return "-"
+
+_slug_table = _SlugTable({ord(c): c for c in "abcdefghijklmnopqrstuvwxyz0123456789"})
 
 def slugify(name: str) -> str:
-    s = (name or "").strip().lower()
-    s = _slug_re.sub("-", s).strip("-")
+    s = (name or "").strip().lower().translate(_slug_table)
+    while "--" in s:  # collapse dash runs; names are short, no regex needed
+        s = s.replace("--", "-")
+    s = s.strip("-")
     return s or "calendar"
 
-def clean_str(v) -> str:
-    if v is None or (isinstance(v, float) and pd.isna(v)):
-        return ""
-    s = str(v).strip()
-    return "" if s.lower() == "nan" else s
-
-def parse_dt(v):
-    if v is None or (isinstance(v, float) and pd.isna(v)):
+def clean_col(s):
+    """Vectorized string cleanup: strip whitespace, blank out NaN / literal 'nan'."""
+    s = s.astype(STRING_DTYPE).str.strip()
+    return s.mask(s.str.lower().eq("nan"), "").fillna("")
+
+def infer_dt_format(s):
+    """Guess one strptime format for a text column, or None.
+
+    The guess is only trusted if it agrees with per-cell ('mixed') parsing on a
+    sample of up to 100 distinct values, so an ambiguous pick such as
+    %Y-%d-%m for ISO dates is rejected.
+    """
+    sample = s.dropna().astype(str).str.strip()
+    sample = sample[sample.ne("")].unique()[:100]
+    if len(sample) == 0:
         return None
-    dt = pd.to_datetime(v, errors="coerce", dayfirst=DAYFIRST, utc=False)
-    if pd.isna(dt):
-        return None
-    return dt
-
-def is_midnight(dt) -> bool:
-    return dt is not None and (getattr(dt, "hour", 0), getattr(dt, "minute", 0), getattr(dt, "second", 0)) == (0, 0, 0)
-
-def make_uid(title, start, end, extra=""):
-    s = f"{title}|{start}|{end}|{extra}"
-    return md5(s.encode("utf-8")).hexdigest() + "@dynamic-cal"
+    ref = pd.to_datetime(sample, errors="coerce", dayfirst=DAYFIRST, format="mixed", utc=True)
+    for dayfirst in (DAYFIRST, not DAYFIRST):
+        fmt = guess_datetime_format(sample[0], dayfirst=dayfirst)
+        if fmt is None:
+            continue
+        got = pd.to_datetime(sample, errors="coerce", format=fmt, utc=True)
+        ok = got.notna()
+        if ok.any() and (got[ok] == ref[ok]).all():
+            return fmt
+    return None
 
-def first_col(df, names):
-    """Return the first matching column name from a list of candidates, else None."""
-    cols = {c.strip().lower(): c for c in df.columns}
+def parse_dt_col(s):
+    """Parse a whole column to naive datetime64 once; unparseable/blank cells become NaT.
+
+    Cells matching DATE_FORMAT (or else the inferred format) take the fast
+    strptime path; only the rest fall back to per-cell dateutil parsing.
+    cache=True parses each distinct string once, since recurring events
+    repeat the same dates. Cells with a zone or offset are converted to UTC
+    and naive cells are taken as UTC, so timed events are written as UTC.
+    """
+    fmt = DATE_FORMAT or infer_dt_format(s)
+    if fmt is None:
+        dt = pd.to_datetime(s, errors="coerce", dayfirst=DAYFIRST, format="mixed", utc=True, cache=True)
+    else:
+        dt = pd.to_datetime(s, errors="coerce", format=fmt, utc=True, cache=True)
+        rest = dt.isna() & s.notna()
+        if rest.any():
+            dt[rest] = pd.to_datetime(s[rest], errors="coerce", dayfirst=DAYFIRST, format="mixed", utc=True, cache=True)
+    return dt.dt.tz_convert(None)
+
+def is_midnight_col(dt):
+    """Boolean mask of non-NaT timestamps that fall exactly on midnight."""
+    return dt.notna() & dt.eq(dt.dt.normalize())
+
+_TRUTHY = frozenset({"true", "1", "yes", "y"})
+
+def is_truthy_col(s):
+    return s.astype(STRING_DTYPE).str.strip().str.lower().isin(_TRUTHY).fillna(False)
+
+def make_uids(keys):
+    """md5-based UIDs for a Series of 'title|start|end|location' keys."""
+    _md5 = md5  # local alias: avoids a global lookup per key
+    return [_md5(b).hexdigest() + "@dynamic-cal" for b in keys.str.encode("utf-8").to_numpy()]
+
+_ics_escape = str.maketrans({"\\": "\\\\", ";": "\\;", ",": "\\,", "\n": "\\n", "\r": "\\r"})
+
+def ics_text(v: str) -> str:
+    """Escape a TEXT value (RFC 5545 §3.3.11)."""
+    return v.translate(_ics_escape)
+
+def ics_line(line: str) -> str:
+    """CRLF-terminate a content line, folding it at 75 octets (RFC 5545 §3.1)."""
+    if len(line) <= 75 and (line.isascii() or len(line.encode("utf-8")) <= 75):
+        return line + "\r\n"
+    if line.isascii():
+        parts = [line[:75]] + [line[i:i + 74] for i in range(75, len(line), 74)]
+    else:
+        # Never split inside a multi-byte UTF-8 sequence
+        parts, cur, size, limit = [], [], 0, 75
+        for ch in line:
+            n = len(ch.encode("utf-8"))
+            if size + n > limit:
+                parts.append("".join(cur))
+                cur, size, limit = [], 0, 74  # continuation lines start with a space
+            cur.append(ch)
+            size += n
+        parts.append("".join(cur))
+    return "\r\n ".join(parts) + "\r\n"
+
+def emit_event(buf, title, dates, loc, desc, url, uid, transp):
+    """Append one VEVENT to buf; dates holds the preformatted DTSTART/DTEND lines."""
+    buf.append("BEGIN:VEVENT\r\n")
+    buf.append(ics_line(f"UID:{uid}"))
+    buf.append(dates)
+    buf.append(ics_line(f"SUMMARY:{ics_text(title)}"))
+    if loc:  buf.append(ics_line(f"LOCATION:{ics_text(loc)}"))
+    if desc: buf.append(ics_line(f"DESCRIPTION:{ics_text(desc)}"))
+    if url:  buf.append(ics_line(f"URL:{ics_text(url)}"))
+    if transp is not None:
+        buf.append("TRANSP:TRANSPARENT\r\n" if transp else "TRANSP:OPAQUE\r\n")
+    buf.append("END:VEVENT\r\n")
+
+def write_if_changed(path, data: bytes):
+    """Write data to path unless the file already holds exactly these bytes (keeps mtimes/caches fresh)."""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return
+    except FileNotFoundError:
+        pass
+    with open(path, "wb") as f:
+        f.write(data)
+
+def write_gzip(path, data: bytes):
+    """Write a precompressed path + '.gz' copy (mtime=0 keeps it byte-stable across builds)."""
+    write_if_changed(path + ".gz", gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0))
+
+def dump_json(obj) -> bytes:
+    """UTF-8 JSON indented by 2 spaces; same bytes from orjson or the stdlib fallback."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+def first_col(cols, names):
+    """Return the first matching column name from a list of candidates, else None.
+
+    cols maps normalized (stripped, lowercased) header -> actual column name.
+    """
     for n in names:
         key = n.strip().lower()
         if key in cols:
             return cols[key]
     return None
 
-def combine_date_time(date_val, time_val):
-    """Combine separate date and time cells into a single Timestamp (or just date if no time)."""
-    d = parse_dt(date_val)
-    if d is None:
-        return None
-    if time_val is None or (isinstance(time_val, float) and pd.isna(time_val)) or str(time_val).strip() == "":
-        return d.normalize()  # midnight
-    t = pd.to_datetime(str(time_val), errors="coerce", dayfirst=DAYFIRST)
-    if pd.isna(t):
-        return d.normalize()
-    return pd.Timestamp(year=d.year, month=d.month, day=d.day, hour=t.hour, minute=t.minute, second=t.second)
+def combine_date_time_col(date_s, time_s):
+    """Combine separate date and time columns into Timestamps (midnight if no/invalid time)."""
+    d = parse_dt_col(date_s).dt.normalize()
+    if time_s is None:
+        return d
+    t = parse_dt_col(time_s)
+    return d + (t - t.dt.normalize()).dt.floor("s").fillna(pd.Timedelta(0))
 
 # ------------------ Load CSV ----------------
-print(f"📥 Downloading CSV from {CSV_URL}")
-resp = requests.get(CSV_URL, timeout=30)
-try:
-    resp.raise_for_status()
-except requests.HTTPError as e:
-    raise SystemExit(
-        f"❌ Failed to fetch CSV ({e}).\n"
-        "➡️ Ensure your Google Sheet is 'Published to the web' and the URL ends with '&output=csv'."
+def load_sheet(url):
+    print(f"📥 Downloading CSV from {url}")
+    with requests.get(url, timeout=30, stream=True) as resp:
+        try:
+            resp.raise_for_status()
+        except requests.HTTPError as e:
+            raise SystemExit(
+                f"❌ Failed to fetch CSV ({e}).\n"
+                "➡️ Ensure your Google Sheet is 'Published to the web' and the URL ends with '&output=csv'."
+            )
+        resp.raw.decode_content = True  # undo gzip/deflate transfer encoding while streaming
+        # Every column is read as text (Arrow-backed when available): dates are parsed once below
+        df = pd.read_csv(resp.raw, dtype=STRING_DTYPE)
+
+    print(f"ℹ️ Loaded {len(df)} rows from sheet.")
+    print("ℹ️ Columns from sheet:", list(df.columns))
+    return df
+
+# ------------------ Prepare events ----------
+def prepare_events(df):
+    """Resolve headers and compute every per-event field column-wise.
+
+    Returns a frame with fixed columns (calendar, title, dates, location,
+    description, url, uid, transp) that build_calendar() consumes.
+    """
+    # Flexible header resolution (normalized header map built once)
+    cols = {c.strip().lower(): c for c in df.columns}
+    col_calendar = first_col(cols, ["Calendar", "Calendar Name", "Feed"])
+    col_title    = first_col(cols, ["Title", "Event", "Name"])
+    col_start    = first_col(cols, ["Start"])
+    col_start_d  = first_col(cols, ["Start Date"])
+    col_start_t  = first_col(cols, ["Start Time"])
+    col_end      = first_col(cols, ["End"])
+    col_end_d    = first_col(cols, ["End Date"])
+    col_end_t    = first_col(cols, ["End Time"])
+    col_loc      = first_col(cols, ["Location", "Place", "Room"])
+    col_desc     = first_col(cols, ["Description", "Details", "Notes"])
+    col_url      = first_col(cols, ["URL", "Link"])
+    col_uid      = first_col(cols, ["UID", "Uid"])
+    col_allday   = first_col(cols, ["All Day", "All-day", "AllDay"])
+    col_transp   = first_col(cols, ["Transparent"])
+
+    missing_keys = []
+    if not col_calendar: missing_keys.append("Calendar")
+    if not col_title:    missing_keys.append("Title/Event/Name")
+    if not (col_start or col_start_d):
+        missing_keys.append("Start OR (Start Date + optional Start Time)")
+    if missing_keys:
+        raise SystemExit("❌ Required columns missing: " + ", ".join(missing_keys))
+
+    # Clean common strings (whole columns at once)
+    for c in [col_calendar, col_title, col_loc, col_desc, col_url, col_uid]:
+        if c:
+            df[c] = clean_col(df[c])
+
+    # Build start/end timestamps from either combined or split columns
+    nat = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    if col_start:
+        start = parse_dt_col(df[col_start])
+    elif col_start_d:
+        start = combine_date_time_col(df[col_start_d], df[col_start_t] if col_start_t else None)
+    if col_end:
+        end = parse_dt_col(df[col_end])
+    elif col_end_d:
+        end = combine_date_time_col(df[col_end_d], df[col_end_t] if col_end_t else None)
+    else:
+        end = nat
+
+    # Determine all-day: explicit flag, or both times blank/midnight
+    all_day = is_midnight_col(start) & (end.isna() | is_midnight_col(end))
+    if col_allday:
+        all_day |= is_truthy_col(df[col_allday])
+
+    # All-day: if only End exists, default to single-day ending date; DTEND is non-inclusive
+    ad_start = start.fillna(end).dt.normalize()
+    ad_end = end.dt.normalize()
+    ad_end = ad_end.where(ad_end > ad_start, ad_start + ONE_DAY)
+
+    # Timed: ensure End > Start
+    t_start = start.fillna(end - DEFAULT_DURATION)
+    t_end = end.where(end > t_start, t_start + DEFAULT_DURATION)
+
+    # Precompute UIDs (explicit UID column wins); all-day keys use the sheet's End as-is
+    uid_start = start.fillna(end).where(all_day, t_start)
+    uid_end = end.where(all_day, t_end)
+    uid_keys = (
+        df[col_title] + "|"
+        + uid_start.dt.strftime("%Y-%m-%d %H:%M:%S").fillna("None") + "|"
+        + uid_end.dt.strftime("%Y-%m-%d %H:%M:%S").fillna("None") + "|"
+        + (df[col_loc] if col_loc else "")
     )
-
-df = pd.read_csv(StringIO(resp.text))
-
-print(f"ℹ️ Loaded {len(df)} rows from sheet.")
-print("ℹ️ Columns from sheet:", list(df.columns))
-
-# Flexible header resolution
-col_calendar = first_col(df, ["Calendar", "Calendar Name", "Feed"])
-col_title    = first_col(df, ["Title", "Event", "Name"])
-col_start    = first_col(df, ["Start"])
-col_start_d  = first_col(df, ["Start Date"])
-col_start_t  = first_col(df, ["Start Time"])
-col_end      = first_col(df, ["End"])
-col_end_d    = first_col(df, ["End Date"])
-col_end_t    = first_col(df, ["End Time"])
-col_loc      = first_col(df, ["Location", "Place", "Room"])
-col_desc     = first_col(df, ["Description", "Details", "Notes"])
-col_url      = first_col(df, ["URL", "Link"])
-col_uid      = first_col(df, ["UID", "Uid"])
-col_allday   = first_col(df, ["All Day", "All-day", "AllDay"])
-col_transp   = first_col(df, ["Transparent"])
-
-missing_keys = []
-if not col_calendar: missing_keys.append("Calendar")
-if not col_title:    missing_keys.append("Title/Event/Name")
-if not (col_start or col_start_d):
-    missing_keys.append("Start OR (Start Date + optional Start Time)")
-if missing_keys:
-    raise SystemExit("❌ Required columns missing: " + ", ".join(missing_keys))
-
-# Clean common strings
-for c in [col_calendar, col_title, col_loc, col_desc, col_url, col_uid]:
-    if c:
-        df[c] = df[c].apply(clean_str)
-
-# Prepare output
-os.makedirs(ICS_DIR, exist_ok=True)
-manifest = []
-counts = {}
-cal_order = list(dict.fromkeys(df[col_calendar].tolist()))
-total_events = 0
-per_calendar_debug = []
-
-from ics.grammar.parse import ContentLine  # (once, top-level)
-
-for cal_name in cal_order:
-    if not cal_name:
-        continue
-    subset = df[df[col_calendar] == cal_name]
-    if subset.empty:
-        continue
-
-    cal = Calendar()
-    cal.extra.append(ContentLine(name="X-WR-CALNAME", params={}, value=cal_name))
-
-    created = 0
-
-    for _, r in subset.iterrows():
-        title = clean_str(r.get(col_title))
-        if not title:
-            continue
-
-        # Build start/end timestamps from either combined or split columns
-        start_dt = None
-        end_dt = None
-
-        if col_start:
-            start_dt = parse_dt(r.get(col_start))
-        elif col_start_d:
-            start_dt = combine_date_time(r.get(col_start_d), r.get(col_start_t))
-
-        if col_end:
-            end_dt = parse_dt(r.get(col_end))
-        elif col_end_d:
-            end_dt = combine_date_time(r.get(col_end_d), r.get(col_end_t))
-
-        if start_dt is None and end_dt is None:
-            # nothing to place on a calendar
+    ev_start = ad_start.where(all_day, t_start)
+    # DTSTART/DTEND lines formatted column-wise; timed events are written as UTC, as before
+    ad_dates = (
+        "DTSTART;VALUE=DATE:" + ad_start.dt.strftime("%Y%m%d") + "\r\n"
+        + "DTEND;VALUE=DATE:" + ad_end.dt.strftime("%Y%m%d") + "\r\n"
+    )
+    t_dates = (
+        "DTSTART:" + t_start.dt.strftime("%Y%m%dT%H%M%SZ") + "\r\n"
+        + "DTEND:" + t_end.dt.strftime("%Y%m%dT%H%M%SZ") + "\r\n"
+    )
+    live = df[col_title].ne("") & ev_start.notna()  # rows that can be placed on a calendar
+
+    uid = df[col_uid].copy() if col_uid else pd.Series("", index=df.index, dtype=STRING_DTYPE)
+    need_uid = live & uid.eq("")
+    uid.loc[need_uid] = make_uids(uid_keys[need_uid])
+
+    events = pd.DataFrame({
+        # Categorical (categories in first-seen order) so grouping works on integer codes
+        "calendar":    pd.Categorical(df[col_calendar], categories=pd.unique(df[col_calendar])),
+        "title":       df[col_title],
+        "dates":       ad_dates.where(all_day, t_dates),
+        "location":    df[col_loc] if col_loc else "",
+        "description": df[col_desc] if col_desc else "",
+        "url":         df[col_url] if col_url else "",
+        "uid":         uid,
+        # Transparent flag (TRUE = free, FALSE/blank = busy); None if the column is absent
+        "transp":      is_truthy_col(df[col_transp]) if col_transp else None,
+    }, index=df.index)
+
+    # Drop rows with nothing to place on a calendar, and rows that would emit an
+    # identical event in the same calendar; rows sharing only a UID are all kept
+    events = events[live]
+    return events[~events.duplicated(["calendar", *EVENT_FIELDS])]
+
+# ------------------ Build calendars ---------
+def build_calendar(cal_name, ics_path, records):
+    """Write one calendar's events to ics_path; returns the number of events written.
+
+    Runs in a worker process. records are plain tuples in EVENT_FIELDS order,
+    which is cheap to pickle and matches emit_event()'s parameters.
+    """
+    buf = [
+        "BEGIN:VCALENDAR\r\n",
+        "VERSION:2.0\r\n",
+        "PRODID:-//dynamic-cal//calendar-ics-generator//EN\r\n",
+        ics_line(f"X-WR-CALNAME:{ics_text(cal_name)}"),
+    ]
+    for rec in records:
+        emit_event(buf, *rec)
+
+    buf.append("END:VCALENDAR\r\n")
+
+    payload = "".join(buf).encode("utf-8")
+    write_if_changed(ics_path, payload)
+    write_gzip(ics_path, payload)
+    return len(records)
+
+def main():
+    if not CSV_URL:
+        raise ValueError("❌ CSV_URL environment variable is not set (add a repo secret named CSV_URL).")
+
+    events = prepare_events(load_sheet(CSV_URL))
+
+    # Prepare output
+    os.makedirs(ICS_DIR, exist_ok=True)
+    manifest = []
+    jobs = []
+    # One slug per calendar, in sheet order; colliding slugs get -2, -3, ... so no feed overwrites another
+    slugs, seen = {}, set()
+    for name in events["calendar"].cat.categories:
+        if not name:
             continue
-
-        # Determine all-day
-        allday_flag = False
-        if col_allday:
-            v = str(r.get(col_allday)).strip().lower()
-            allday_flag = v in ("true", "1", "yes", "y")
-
-        # If both times are blank or midnight and not explicitly timed, treat as all-day
-        if not allday_flag:
-            if (start_dt is not None and is_midnight(start_dt)) and (end_dt is None or is_midnight(end_dt)):
-                allday_flag = True
-
-        ev = Event()
-        ev.name = title
-
-        if allday_flag:
-            # All-day: use date parts and ensure DTEND > DTSTART (non-inclusive)
-            if start_dt is None and end_dt is not None:
-                # If only End exists, default to single-day ending date
-                start_dt = end_dt
-            ev.begin = start_dt.date()
-            ev.make_all_day()
-            if end_dt is None or end_dt.date() <= start_dt.date():
-                ev.end = (start_dt + pd.Timedelta(days=1)).date()
-            else:
-                ev.end = end_dt.date()
-        else:
-            # Timed: ensure End > Start
-            if start_dt is None and end_dt is not None:
-                start_dt = end_dt - pd.Timedelta(hours=DEFAULT_TIMED_DURATION_HOURS)
-            if end_dt is None or end_dt <= start_dt:
-                end_dt = start_dt + pd.Timedelta(hours=DEFAULT_TIMED_DURATION_HOURS)
-            ev.begin = start_dt
-            ev.end = end_dt
-
-        # Optional fields
-        if col_loc:  ev.location    = clean_str(r.get(col_loc)) or None
-        if col_desc: ev.description = clean_str(r.get(col_desc)) or None
-        if col_url:  ev.url         = clean_str(r.get(col_url)) or None
-
-        uid = clean_str(r.get(col_uid)) if col_uid else ""
-        ev.uid = uid or make_uid(title, start_dt, end_dt, ev.location or "")
-
-        # Transparent flag (TRUE = free, FALSE/blank = busy)
-        if col_transp:
-            v = str(r.get(col_transp)).strip().lower()
-            ev.transparent = v in ("true", "1", "yes", "y")
-
-        cal.events.add(ev)
-        created += 1
-        total_events += 1
-
-    # Write ICS if any events for this calendar
-    slug = slugify(cal_name)
-    rel_ics = f"/calendars/{slug}.ics"
-    if rel_ics.endswith("}"):
-        rel_ics = rel_ics[:-1]
-    ics_path = os.path.join(OUT_DIR, rel_ics.lstrip("/"))
-
-    # Keep a small debug record
-    per_calendar_debug.append((cal_name, created))
-
-    with open(ics_path, "w", encoding="utf-8") as f:
-        f.writelines(cal.serialize_iter())
-
-    manifest.append({"name": cal_name, "slug": slug, "ics": rel_ics})
-    counts[cal_name] = created
-    print(f"✅ Wrote {ics_path} ({created} events)")
-
-# Diagnostics summary
-print("—— Summary ——")
-print(f"Calendars found: {len(per_calendar_debug)}")
-for name, cnt in per_calendar_debug:
-    print(f"  • {name}: {cnt} events")
-print(f"Total events across all calendars: {total_events}")
-
-# If zero events, fail with helpful info
-if total_events == 0:
-    print("❌ No events were generated. Please verify your sheet.")
-    raise SystemExit(1)
-
-# ------------------ Write manifest ----------
-with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
-    json.dump(manifest, f, ensure_ascii=False, indent=2)
-
-# ------------------ Landing page ------------
-index_html = r"""<!doctype html>
-<html lang="en">
-<head>
-<meta charset="utf-8">
-<meta name="viewport" content="width=device-width,initial-scale=1">
-<title>Subscribe to Calendars</title>
-<style>
-:root{
-  /* Core palette */
-  --bg: #f6f4e8;         /* page background */
-  --card: #881228;       /* card background */
-  --text: #ffffff;       /* main title text */
-  --muted: #f5f5f5;      /* subheadline */
-
-  /* Brands */
-  --apple-bg:   #979797; --apple-text:   #ffffff;
-  --google-bg:  #ea4335; --google-text:  #ffffff;
-  --outlook-bg: #0078d4; --outlook-text: #ffffff;
-
-  /* Controls */
-  --copy-bg:#000000; --copy-text:#ffffff;          /* per your request */
-  --dropdown-text:#000000; --chev:#000000;
-
-  /* Layout + sizing */
-  --radius: 18px;
-  --gap: 14px;             /* gap between items in rows */
-  --control-h: 62px;       /* dropdown + copy height (desktop) */
-  --shadow: 0 24px 48px rgba(0,0,0,.15);
-}
-
-*{box-sizing:border-box}
-html,body{margin:0;background:var(--bg);font-family:system-ui,-apple-system,Segoe UI,Roboto,Ubuntu,"Helvetica Neue",Arial,sans-serif;color:var(--text)}
-
-.container{max-width:1080px;margin:44px auto;padding:0 20px}
-.card{background:var(--card);border-radius:28px;box-shadow:var(--shadow);padding:28px 28px 32px}
-
-h1{margin:0 0 10px;font-size:40px;letter-spacing:.2px}
-p.lead{margin:0 0 18px;color:var(--muted);font-size:18px;line-height:1.45}
-
-.row{display:flex;align-items:center;gap:var(--gap);flex-wrap:wrap}
-
-/* --- Select (dropdown) --- */
-.select-wrap{
-  position:relative;
-  height:var(--control-h);
-  display:inline-flex;
-  align-items:center;
-  border-radius:14px;
-  background:#fff;
-  box-shadow:0 1px 0 rgba(0,0,0,.12), 0 6px 18px rgba(0,0,0,.18);
-  padding:0 24px;          /* even padding; select will add right padding for chevron */
-  overflow:hidden;         /* ensures select stays within */
-}
-#calSel{
-  appearance:none;
-  border:none;
-  outline:none;
-  font-size:20px;
-  color:var(--dropdown-text);
-  background:transparent;
-  height:100%;
-  width:100%;              /* fill wrapper so whole area is clickable */
-  display:block;
-  padding-right:32px;      /* reserve room for chevron */
-  cursor:pointer;
-}
-.select-wrap:after{
-  content:"";
-  position:absolute;
-  right:30px;              /* slightly inset */
-  top:50%;
-  width:10px; height:10px; /* smaller chevron */
-  transform:translateY(-50%) rotate(45deg);
-  border-right:2px solid var(--chev);
-  border-bottom:2px solid var(--chev);
-  opacity:.9;
-  pointer-events:none;     /* chevron never blocks clicks */
-}
-
-/* Copy button — same height as dropdown (desktop) */
-#copyBtn{
-  height:var(--control-h);
-  width:96px;
-  padding:0 12px;
-  border:none;
-  border-radius:14px;
-  background:var(--copy-bg);
-  color:var(--copy-text);
-  font-size:20px;
-  font-weight:700;
-  cursor:pointer;
-  box-shadow:0 1px 0 rgba(0,0,0,.12), 0 6px 18px rgba(0,0,0,.18);
-}
-
-/* Brand buttons row */
-.btn{border:none;border-radius:14px;cursor:pointer;padding:12px 20px;font-size:20px;font-weight:700;transition:.15s transform ease,.2s filter}
-.apple{background:var(--apple-bg);color:var(--apple-text)}
-.google{background:var(--google-bg);color:var(--google-text)}
-.outlook{background:var(--outlook-bg);color:var(--outlook-text)}
-
-/* ---- Hovers ---- */
-.btn:hover{
-  transform:translateY(-1px);
-  filter:brightness(1.05);
-}
-.apple:hover{ box-shadow:0 2px 0 rgba(0,0,0,.10), 0 10px 22px rgba(0,0,0,.18) }
-.google:hover{ background:#d93c2f }
-.outlook:hover{ background:#0069bd }
-#copyBtn:hover{ box-shadow:0 2px 0 rgba(0,0,0,.10), 0 10px 22px rgba(0,0,0,.18) }
-.select-wrap:hover{ box-shadow:0 2px 0 rgba(0,0,0,.12), 0 10px 24px rgba(0,0,0,.22) }
-
-/* ---------- Mobile layout (<=760px) ---------- */
-@media (max-width:760px){
-  :root{
-    --control-h: 56px;            /* slightly shorter controls on mobile */
-  }
-  .row{gap:12px}
-  h1{font-size:34px}
-  #calSel{font-size:18px}         /* slightly smaller so long names fit */
-  /* Make dropdown and all buttons full-width and same width */
-  #rowControls, #rowBrands{flex-direction:column; align-items:stretch}
-  .select-wrap{width:100% !important}
-  #copyBtn{width:100%}
-  #appleBtn, #googleBtn, #olLiveBtn, #olWorkBtn{width:100%}
-}
-</style>
-</head>
-<body>
-  <div class="container">
-    <div class="card">
-      <h1>Subscribe to Calendars</h1>
-      <p class="lead">Choose a calendar, then subscribe. Use <em>Copy link</em> to grab the raw ICS URL.</p>
-
-      <!-- Controls row (dropdown + copy) -->
-      <div class="row" id="rowControls">
-        <div class="select-wrap" id="selectWrap">
-          <select id="calSel" aria-label="Choose calendar"></select>
-        </div>
-        <button id="copyBtn">Copy</button>
-      </div>
-
-      <!-- Brand buttons row -->
-      <div class="row" id="rowBrands" style="margin-top:16px">
-        <button id="appleBtn"  class="btn apple">Apple Calendar</button>
-        <button id="googleBtn" class="btn google">Google Calendar</button>
-        <button id="olLiveBtn" class="btn outlook">Outlook (personal)</button>
-        <button id="olWorkBtn" class="btn outlook">Outlook (work/school)</button>
-      </div>
-    </div>
-  </div>
-
-<script>
-(async function(){
-  // Load manifest
-  async function loadManifest(){
-    const url = new URL('calendars.json', location.href).href;
-    const res = await fetch(url, {cache:'no-store'});
-    if(!res.ok) throw new Error('Failed to load calendars.json');
-    return res.json();
-  }
-  function absUrl(rel){ return new URL(rel, location.href).href; }
-  function currentIcsUrl(){
-    const sel = document.getElementById('calSel');
-    return absUrl('calendars/' + sel.value + '.ics');
-  }
-
-  // Wire buttons (uses current dropdown selection)
-  function setButtons(){
-    const sel = document.getElementById('calSel');
-    const name = encodeURIComponent(sel.options[sel.selectedIndex].text);
-    const enc  = encodeURIComponent(currentIcsUrl());
-
-    // Apple (webcal)
-    document.getElementById('appleBtn').onclick = () =>
-      location.href = 'webcal://' + currentIcsUrl().replace(/^https?:\/\//,'');
-
-    // Google: open Add-by-URL with cid prefilled
-    document.getElementById('googleBtn').onclick = () =>
-      window.open('https://calendar.google.com/calendar/u/0/r/settings/addbyurl?cid='+enc, '_blank');
-
-    // Outlook (personal)
-    document.getElementById('olLiveBtn').onclick = () =>
-      window.open('https://outlook.live.com/calendar/0/addfromweb?url='+enc+'&name='+name, '_blank');
-
-    // Outlook (work/school)
-    document.getElementById('olWorkBtn').onclick = () =>
-      window.open('https://outlook.office.com/calendar/0/addfromweb?url='+enc+'&name='+name, '_blank');
-  }
-
-  // Copy link
-  document.getElementById('copyBtn').onclick = async () => {
-    try{
-      await navigator.clipboard.writeText(currentIcsUrl());
-      const b = document.getElementById('copyBtn');
-      const old = b.textContent;
-      b.textContent = 'Copied!';
-      setTimeout(()=>b.textContent=old, 1200);
-    }catch(e){
-      alert('Copy failed. Link:\\n' + currentIcsUrl());
-    }
-  };
-
-  // --- Auto width for dropdown: Apple width + gap + Google width (desktop) ---
-  function syncDropdownWidth(){
-    const apple  = document.getElementById('appleBtn');
-    const google = document.getElementById('googleBtn');
-    const wrap   = document.getElementById('selectWrap');
-    const brandsRow = document.getElementById('rowBrands');
-
-    if (!apple || !google || !wrap || !brandsRow) return;
-
-    // On mobile layout we use full width; skip measuring
-    const isMobile = window.matchMedia('(max-width: 760px)').matches;
-    if (isMobile){
-      wrap.style.width = '100%';
-      return;
-    }
-
-    const gap = parseFloat(getComputedStyle(brandsRow).gap || '14');
-    const width = apple.offsetWidth + gap + google.offsetWidth;
-    wrap.style.width = width + 'px';          // dropdown width
-  }
-
-  // Make wrapper click also open the native picker (mobile-friendly)
-  (function(){
-    const wrap = document.getElementById('selectWrap');
-    const sel  = document.getElementById('calSel');
-    if (wrap && sel) {
-      wrap.addEventListener('click', () => {
-        if (typeof sel.showPicker === 'function') sel.showPicker();
-        else sel.focus();
-      });
-    }
-  })();
-
-  // Populate dropdown from manifest, then size + wire
-  try{
-    const calendars = await loadManifest();
-    const sel = document.getElementById('calSel');
-    sel.innerHTML = '';
-    calendars.forEach((c) => {
-      const opt = document.createElement('option');
-      opt.value = c.slug;
-      opt.textContent = c.name;
-      sel.appendChild(opt);
-    });
-    sel.addEventListener('change', setButtons);
-    setButtons();
-    // Defer to ensure buttons have layout
-    requestAnimationFrame(syncDropdownWidth);
-    window.addEventListener('resize', syncDropdownWidth);
-  }catch(e){
-    console.error(e);
-  }
-})();
-</script>
-</body>
-</html>
-"""
-
-with open(INDEX_HTML_PATH, "w", encoding="utf-8") as f:
-    f.write(index_html)
-
-print("✅ Wrote", MANIFEST_PATH)
-print("✅ Wrote", INDEX_HTML_PATH)
-print("🎉 Build complete.")
+        base = slug = slugify(name)
+        n = 2
+        while slug in seen:
+            slug = f"{base}-{n}"
+            n += 1
+        slugs[name] = slug
+        seen.add(slug)
+    # Plain object rows (preformatted strings and flags), split per calendar by position
+    rows = events[EVENT_FIELDS].to_numpy()
+    positions = events.groupby("calendar", sort=False, observed=True).indices
+    # Every named calendar gets a feed, even if none of its rows could be placed
+    for cal_name, slug in slugs.items():
+        records = [tuple(r) for r in rows[positions.get(cal_name, [])]]
+        rel_ics = f"/calendars/{slug}.ics"
+        ics_path = f"{ICS_DIR}/{slug}.ics"
+        manifest.append({"name": cal_name, "slug": slug, "ics": rel_ics})
+        jobs.append((cal_name, ics_path, records))
+
+    # Calendars are independent: build them in parallel when there is more than one
+    names, paths, batches = zip(*jobs) if jobs else ((), (), ())
+    if len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as ex:
+            created = list(ex.map(build_calendar, names, paths, batches))
+    else:
+        created = list(map(build_calendar, names, paths, batches))
+
+    per_calendar_debug = list(zip(names, created))
+    total_events = sum(created)
+    for ics_path, n in zip(paths, created):
+        print(f"✅ Wrote {ics_path} ({n} events)")
+
+    # Diagnostics summary
+    print("—— Summary ——")
+    print(f"Calendars found: {len(per_calendar_debug)}")
+    for name, cnt in per_calendar_debug:
+        print(f"  • {name}: {cnt} events")
+    print(f"Total events across all calendars: {total_events}")
+
+    # If zero events, fail with helpful info
+    if total_events == 0:
+        print("❌ No events were generated. Please verify your sheet.")
+        raise SystemExit(1)
+
+    # Write manifest
+    write_if_changed(MANIFEST_PATH, dump_json(manifest))
+
+    # Landing page (static; see templates/index.html)
+    with open(INDEX_TEMPLATE_PATH, "rb") as f:
+        index_html = f.read()
+    write_if_changed(INDEX_HTML_PATH, index_html)
+    write_gzip(INDEX_HTML_PATH, index_html)
+
+    print("✅ Wrote", MANIFEST_PATH)
+    print("✅ Wrote", INDEX_HTML_PATH)
+    print("🎉 Build complete.")
+
+if __name__ == "__main__":
+    main()